@@ -1,3 +1,6 @@
+import asyncio
+import socket
+
 import aiohttp
 import discord
 from discord.ext import commands, events
@@ -18,23 +21,34 @@ ESSENTIAL_COGS = [
 COGS = [
     "automod",
     "autopost",
-    "auto_lock_threads",
-    "collectors",
-    "forms",
     "giveaways",
     "help_desk",
     "levels",
     "moderation",
     "names",
-    "poketwo_administration",
     "reaction_roles",
-    "reminders",
     "reputation",
     "role_sync",
+]
+
+# Cogs without gateway listeners, loaded once the bot is ready.
+LAZY_COGS = [
+    "auto_lock_threads",
+    "collectors",
+    "forms",
+    "poketwo_administration",
+    "reminders",
     "tags",
     "outline",
 ]
 
+CACHED_COGS = {
+    "Mongo": "_mongo",
+    "Redis": "_redis",
+    "Logging": "_logging",
+    "Data": "_data",
+}
+
 
 class Bot(commands.Bot, events.EventsMixin):
     def __init__(self, **kwargs):
@@ -47,50 +61,104 @@ class Bot(commands.Bot, events.EventsMixin):
         )
 
         self.config = config
+        self.http_session: aiohttp.ClientSession | None = None
+        self._lazy_cogs_task: asyncio.Task | None = None
+
+        self._mongo = None
+        self._redis = None
+        self._logging = None
+        self._data = None
 
     async def _async_setup_hook(self):
         await super()._async_setup_hook()
-        self.http.connector = aiohttp.TCPConnector(limit=0)
+        self.http.connector = aiohttp.TCPConnector(
+            limit=0, resolver=aiohttp.AsyncResolver(), family=socket.AF_INET, ttl_dns_cache=300
+        )
 
     async def setup_hook(self):
-        self.http_session = aiohttp.ClientSession()
-        await self.load_extension("jishaku")
-        for i in ESSENTIAL_COGS:
-            await self.load_extension(f"cogs.{i}")
-        for i in COGS:
-            await self.load_extension(f"cogs.{i}")
+        # Shared by all cogs, don't create ad-hoc sessions elsewhere
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=10,
+                resolver=aiohttp.AsyncResolver(),
+                family=socket.AF_INET,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True,
+            ),
+            timeout=aiohttp.ClientTimeout(total=30, connect=10),
+        )
+        await asyncio.gather(
+            self.load_extension("jishaku"),
+            *(self.load_extension(f"cogs.{i}") for i in ESSENTIAL_COGS),
+        )
+        await self.load_cogs(COGS)
+
+    async def load_cogs(self, cogs):
+        results = await asyncio.gather(*(self.load_extension(f"cogs.{i}") for i in cogs), return_exceptions=True)
+        for name, result in zip(cogs, results):
+            if isinstance(result, Exception):
+                self.log.error(f"Failed to load cog {name}", exc_info=result)
+
+    async def add_cog(self, cog, /, **kwargs):
+        await super().add_cog(cog, **kwargs)
+
+        # These are used on nearly every event, so keep direct references instead of going through get_cog
+        if attr := CACHED_COGS.get(cog.qualified_name):
+            setattr(self, attr, cog)
+
+    async def remove_cog(self, name, /, **kwargs):
+        cog = await super().remove_cog(name, **kwargs)
+
+        # Don't keep handing out a cog (and its closed clients) after it's been unloaded
+        if cog is not None and (attr := CACHED_COGS.get(cog.qualified_name)) and getattr(self, attr) is cog:
+            setattr(self, attr, None)
+
+        return cog
 
     @property
     def mongo(self):
-        return self.get_cog("Mongo")
+        return self._mongo
 
     @property
     def redis(self):
-        return self.get_cog("Redis").pool
+        return self._redis.pool
 
     @property
     def poketwo_redis(self):
-        return self.get_cog("Redis").poketwo_pool
+        return self._redis.poketwo_pool
 
     @property
     def log(self):
-        return self.get_cog("Logging").log
+        return self._logging.log
 
     @property
     def data(self):
-        return self.get_cog("Data").instance
+        return self._data.instance
 
     async def on_ready(self):
         self.log.info(f"Ready called.")
+        # on_ready is dispatched again after every reconnect, only load these the first time
+        if self._lazy_cogs_task is None:
+            self._lazy_cogs_task = self.loop.create_task(self.load_cogs(LAZY_COGS))
 
     async def close(self):
         self.log.info("Shutting down")
         await super().close()
+        if self.http_session is not None:
+            await self.http_session.close()
 
     async def get_context(self, origin, /, *, cls=GuiduckContext):
         return await super().get_context(origin, cls=cls)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     bot = Bot()
     bot.run(config.BOT_TOKEN)
@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta, timezone
 
 import discord
-import pymongo.errors
 from discord.ext import commands, tasks
 
+ENTRANTS_KEY = "one_mil_giveaway:entrants"
+
+# Added to the entrants set once it has been filled from Mongo, so the set can be used for counting
+ENTRANTS_SEEDED_MARKER = "seeded"
+
 
 class EnterGiveawayView(discord.ui.View):
     def __init__(self, bot):
@@ -12,9 +16,13 @@ class EnterGiveawayView(discord.ui.View):
 
     @discord.ui.button(label="Enter Giveaway", style=discord.ButtonStyle.primary, custom_id="persistent:1_mil_giveaway")
     async def enter_giveaway(self, interaction, _button):
-        try:
-            await self.bot.mongo.db.one_mil_giveaway_entry.insert_one({"_id": interaction.user.id})
-        except pymongo.errors.DuplicateKeyError:
+        result = await self.bot.mongo.db.one_mil_giveaway_entry.update_one(
+            {"_id": interaction.user.id},
+            {"$setOnInsert": {"entered_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        await self.bot.redis.sadd(ENTRANTS_KEY, interaction.user.id)
+        if result.upserted_id is None:
             await interaction.response.send_message("You have already entered the giveaway!", ephemeral=True)
         else:
             await interaction.response.send_message("You have entered the giveaway!", ephemeral=True)
@@ -27,6 +35,7 @@ class OneMilGiveaway(commands.Cog):
         self.bot = bot
         self.view = EnterGiveawayView(self.bot)
         self.message = None
+        self.last_count = None
         self.bot.add_view(self.view)
         self.edit_entrants.start()
 
@@ -34,6 +43,7 @@ class OneMilGiveaway(commands.Cog):
     @commands.is_owner()
     async def send_giveaway_message(self, ctx):
         self.message = await ctx.send("Click the button below to enter the giveaway!", view=self.view)
+        self.last_count = None
         self.edit_entrants.cancel()
         self.edit_entrants.start()
 
@@ -49,14 +59,33 @@ class OneMilGiveaway(commands.Cog):
         if self.message is None:
             return
 
-        number = await self.bot.mongo.db.one_mil_giveaway_entry.count_documents({})
+        if not await self.bot.redis.sismember(ENTRANTS_KEY, ENTRANTS_SEEDED_MARKER):
+            await self.seed_entrants()
+        number = max(await self.bot.redis.scard(ENTRANTS_KEY) - 1, 0)
+        if number == self.last_count:
+            return
+
         await self.message.edit(
             content=(
                 "Click the button below to enter the giveaway!\n"
                 f"Current # entrants: {number:,}\n"
-                f"Next update {discord.utils.format_dt(self.edit_entrants.next_iteration, 'R')}"
+                f"Last updated {discord.utils.format_dt(discord.utils.utcnow(), 'R')}"
             )
         )
+        self.last_count = number
+
+    async def seed_entrants(self):
+        """Adds every entrant stored in Mongo to the Redis entrants set."""
+
+        # Adding to a set is idempotent, so people entering while this runs are neither lost nor counted twice
+        cursor = self.bot.mongo.db.one_mil_giveaway_entry.find({}, {"_id": 1}, batch_size=1000)
+        user_ids = []
+        async for x in cursor:
+            user_ids.append(x["_id"])
+            if len(user_ids) >= 1000:
+                await self.bot.redis.sadd(ENTRANTS_KEY, *user_ids)
+                user_ids = []
+        await self.bot.redis.sadd(ENTRANTS_KEY, ENTRANTS_SEEDED_MARKER, *user_ids)
 
     @edit_entrants.before_loop
     async def before_edit_entrants(self):
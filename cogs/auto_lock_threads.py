@@ -1,10 +1,13 @@
-from collections import defaultdict
+import asyncio
 from datetime import datetime, timedelta, timezone
 
 from discord.ext import commands, tasks
 
 from helpers import constants
 
+WARNED_1_HOUR = 1 << 0
+WARNED_24_HOURS = 1 << 1
+
 
 class AutoLockThreads(commands.Cog):
     """For automatically locking threads."""
@@ -12,17 +15,20 @@ class AutoLockThreads(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.lock_threads.start()
-        self.warned_thread_ids = defaultdict(set)
+        self.warned_threads = {}
 
-    async def send_warning(self, thread, time):
-        if thread.id in self.warned_thread_ids[time]:
+    async def send_warning(self, thread, flag, time):
+        if self.warned_threads.get(thread.id, 0) & flag:
             return
         await thread.send(f"This thread will be locked in **{time}**.")
-        self.warned_thread_ids[time].add(thread.id)
+        self.warned_threads[thread.id] = self.warned_threads.get(thread.id, 0) | flag
 
     def clear_warnings(self, thread):
-        for time in self.warned_thread_ids:
-            self.warned_thread_ids[time].discard(thread.id)
+        self.warned_threads.pop(thread.id, None)
+
+    async def lock_thread(self, thread):
+        await thread.edit(archived=True, locked=True)
+        self.clear_warnings(thread)
 
     @tasks.loop(seconds=15)
     async def lock_threads(self):
@@ -32,18 +38,28 @@ class AutoLockThreads(commands.Cog):
 
         channel = guild.get_channel(1019656562119295098)
 
+        # Threads are locked 7 days after creation, compare creation times against these cutoffs
+        lock_cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+        warn_1_hour_cutoff = lock_cutoff + timedelta(hours=1)
+        warn_24_hours_cutoff = lock_cutoff + timedelta(hours=23)
+        skip_cutoff = lock_cutoff + timedelta(days=1)
+
+        coros = []
         for thread in channel.threads:
-            if thread.flags.pinned:
+            if thread.flags.pinned or thread.created_at >= skip_cutoff:
                 continue
-            time_left = thread.created_at + timedelta(days=7) - datetime.now(timezone.utc)
-
-            if time_left < timedelta():
-                await thread.edit(archived=True, locked=True)
-                self.clear_warnings(thread)
-            elif time_left < timedelta(hours=1):
-                await self.send_warning(thread, "1 hour")
-            elif timedelta(hours=23) < time_left < timedelta(days=1):
-                await self.send_warning(thread, "24 hours")
+
+            if thread.created_at < lock_cutoff:
+                coros.append(self.lock_thread(thread))
+            elif thread.created_at < warn_1_hour_cutoff:
+                coros.append(self.send_warning(thread, WARNED_1_HOUR, "1 hour"))
+            elif thread.created_at > warn_24_hours_cutoff:
+                coros.append(self.send_warning(thread, WARNED_24_HOURS, "24 hours"))
+
+        # Separate threads can be edited concurrently, discord.py handles any rate limits
+        for result in await asyncio.gather(*coros, return_exceptions=True):
+            if isinstance(result, Exception):
+                self.bot.log.error("Failed to lock or warn thread", exc_info=result)
 
     @lock_threads.before_loop
     async def before_lock_threads(self):
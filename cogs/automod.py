@@ -1,9 +1,11 @@
 import abc
-import json
+import asyncio
 import re
+import time
+from collections import deque
 from contextlib import suppress
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, Tuple
+from typing import Dict, NamedTuple, Optional, Tuple
 
 import discord
 from discord.ext import commands
@@ -11,22 +13,52 @@ from discord.ext.menus.views import ViewMenuPages
 
 from helpers import checks, constants
 from helpers.pagination import EmbedListPageSource
+from helpers.utils import FakeContext
 
-INVITE_REGEX = r"(?:https?://)?discord(?:app)?\.(?:com/invite|gg)/([a-zA-Z0-9]+)/?"
-URL_REGEX = r"(?:https?:)?(?:\/\/)?(?:[^@\n]+@)?(?:www\.)?([^:\/\n]+)"
+INVITE_REGEX = re.compile(r"(?:https?://)?discord(?:app)?\.(?:com/invite|gg)/([a-zA-Z0-9]+)/?", flags=re.I | re.ASCII)
+URL_REGEX = re.compile(r"(?:https?:)?(?:\/\/)?(?:[^@\n]+@)?(?:www\.)?([^:\/\n]+)", flags=re.ASCII)
 
 
 class AutomodModule(abc.ABC):
     bucket: str
     punishments: Dict[int, Tuple[str, Optional[timedelta]]]
+    tiers: Tuple[Tuple[str, Optional[timedelta]], ...]
+    needs_content = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Punishments indexed by the number of past offenses, up to the highest threshold
+        cls.tiers = tuple(
+            cls.punishments[max(c for c in cls.punishments if c <= i)] for i in range(max(cls.punishments) + 1)
+        )
+
+    def punishment_for(self, count):
+        return self.tiers[min(count, len(self.tiers) - 1)]
 
     @abc.abstractmethod
-    async def check(self, ctx):
+    async def check(self, ctx, content):
+        """Checks a message, given its casefolded content (None for modules that don't need it)."""
         pass
 
 
+def compile_banned_words(words):
+    if not words:
+        return None
+    # Longest first, so that a banned word isn't cut short by another one that is its prefix
+    alternation = "|".join(re.escape(x) for x in sorted(words, key=len, reverse=True))
+    # Unlike \b, these boundaries also work for words starting or ending with punctuation
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+
+
+class CachedBannedWords(NamedTuple):
+    expires_at: float
+    words: frozenset[str]
+    pattern: Optional[re.Pattern]
+
+
 class BannedWords(AutomodModule):
     bucket = "banned_words"
+    invalidate_channel = "automod:banned_words:invalidate"
     punishments = {
         4: ("ban", None),
         3: ("timeout", timedelta(days=4)),
@@ -36,18 +68,35 @@ class BannedWords(AutomodModule):
     }
 
     def __init__(self, bot):
-        self.url_regex = re.compile(URL_REGEX)
         self.bot = bot
+        self._banned = {}
+
+    async def cache(self, guild):
+        key = f"banned_words:{guild.id}"
+        data = await self.bot.mongo.db.guild.find_one({"_id": guild.id})
+        words = [] if data is None else data.get("banned_words", [])
+
+        # The empty string can never be a word, it keeps the set from being empty
+        tr = self.bot.redis.multi_exec()
+        tr.delete(key)
+        tr.sadd(key, "", *words)
+        tr.expire(key, 3600)
+        await tr.execute()
+        return words
 
     async def fetch(self, guild):
-        words = await self.bot.redis.get(f"banned_words:{guild.id}")
-        if words is None:
-            data = await self.bot.mongo.db.guild.find_one({"_id": guild.id})
-            words = [] if data is None else data.get("banned_words")
-            await self.bot.redis.set(f"banned_words:{guild.id}", json.dumps(words), expire=3600)
-        else:
-            words = json.loads(words)
-        return words
+        words = await self.bot.redis.smembers(f"banned_words:{guild.id}", encoding="utf-8")
+        if not words:
+            words = await self.cache(guild)
+        return sorted(x for x in words if x)
+
+    async def fetch_cached(self, guild):
+        cached = self._banned.get(guild.id)
+        if cached is None or cached.expires_at < time.monotonic():
+            words = await self.fetch(guild)
+            cached = CachedBannedWords(time.monotonic() + 3600, frozenset(words), compile_banned_words(words))
+            self._banned[guild.id] = cached
+        return cached
 
     async def update(self, guild, push=None, pull=None):
         update = {}
@@ -57,22 +106,36 @@ class BannedWords(AutomodModule):
             update["$pull"] = {"banned_words": {"$in": pull}}
         await self.bot.mongo.db.guild.update_one({"_id": guild.id}, update, upsert=True)
         await self.bot.redis.delete(f"banned_words:{guild.id}")
+        self._banned.pop(guild.id, None)
+        await self.bot.redis.publish(self.invalidate_channel, guild.id)
 
-    async def check(self, ctx):
+    async def watch_invalidations(self):
+        """Drops in-process lists that were updated by other instances."""
+
+        (channel,) = await self.bot.redis.subscribe(self.invalidate_channel)
+        try:
+            async for guild_id in channel.iter(encoding="utf-8"):
+                self._banned.pop(int(guild_id), None)
+        finally:
+            await self.bot.redis.unsubscribe(self.invalidate_channel)
+
+    async def check(self, ctx, content):
         if isinstance(ctx.channel, discord.Thread) and ctx.channel.parent.id == 984579960037576855:
             return
 
-        banned = set(await self.fetch(ctx.guild))
+        banned = await self.fetch_cached(ctx.guild)
+        if banned.pattern is None:
+            return
 
-        words = ctx.message.content.casefold().split()
-        word = discord.utils.find(lambda x: x in banned, words)
-        if word is not None:
-            return f"The word `{word}` is banned, watch your language."
+        if match := banned.pattern.search(content):
+            return f"The word `{match.group()}` is banned, watch your language."
 
-        domains = self.url_regex.findall(ctx.message.content.casefold())
-        domain = discord.utils.find(lambda x: x in banned, domains)
-        if domain is not None:
-            return f"The site `{domain}` is banned, watch your language."
+        if "." not in content:
+            return
+
+        domains = banned.words.intersection(URL_REGEX.findall(content))
+        if domains:
+            return f"The site `{min(domains)}` is banned, watch your language."
 
 
 class MassMention(AutomodModule):
@@ -83,7 +146,7 @@ class MassMention(AutomodModule):
         0: ("timeout", timedelta(hours=2)),
     }
 
-    async def check(self, ctx):
+    async def check(self, ctx, content):
         if ctx.channel.id == 722244899767844866:
             return
         if len(ctx.message.mentions) >= 10:
@@ -98,22 +161,64 @@ class ServerInvites(AutomodModule):
         1: ("timeout", timedelta(hours=2)),
         0: ("warn", None),
     }
+    invite_cache_size = 512
+    invite_cache_ttl = 600  # seconds
 
     def __init__(self, bot):
-        self.regex = re.compile(INVITE_REGEX, flags=re.I)
         self.bot = bot
+        self._invite_guilds = {}
+
+    async def fetch_invite_guild_id(self, code):
+        """Returns the ID of the server an invite points to, 0 if it isn't for a server, or None if it's invalid."""
+
+        expires_at, guild_id = self._invite_guilds.get(code, (0, None))
+        if expires_at < time.monotonic():
+            try:
+                invite = await self.bot.fetch_invite(code, with_counts=False, with_expiration=False)
+            except discord.NotFound:
+                guild_id = None
+            else:
+                guild_id = invite.guild.id if invite.guild is not None else 0
+            self._invite_guilds.pop(code, None)
+            if len(self._invite_guilds) >= self.invite_cache_size:
+                # Dicts keep insertion order, so this is the entry that was cached the longest ago
+                del self._invite_guilds[next(iter(self._invite_guilds))]
+            self._invite_guilds[code] = (time.monotonic() + self.invite_cache_ttl, guild_id)
+        return guild_id
+
+    async def check(self, ctx, content):
+        if "discord" not in content:
+            return
 
-    async def check(self, ctx):
-        for code in self.regex.findall(ctx.message.content):
-            with suppress(discord.NotFound):
-                invite = await self.bot.fetch_invite(code)
-                if invite.guild != ctx.guild:
-                    return f"Sending invites to another server."
+        codes = set(INVITE_REGEX.findall(ctx.message.content))
+        if not codes:
+            return
+
+        guild_ids = await asyncio.gather(*(self.fetch_invite_guild_id(code) for code in codes))
+        if any(x is not None and x != ctx.guild.id for x in guild_ids):
+            return f"Sending invites to another server."
 
 
 CATCHING_CATEGORY_ID = 717872471411261510
 
 
+def channel_member_key(message):
+    return message.channel.id, message.author.id
+
+
+class MessageTrackingCooldown(commands.Cooldown):
+    """A cooldown that also remembers the messages that were counted towards it."""
+
+    __slots__ = ("messages",)
+
+    def __init__(self, rate, per):
+        super().__init__(rate, per)
+        self.messages = deque(maxlen=rate)
+
+    def copy(self):
+        return MessageTrackingCooldown(self.rate, self.per)
+
+
 class Spamming(AutomodModule):
     bucket = "spamming"
     punishments = {
@@ -126,28 +231,32 @@ class Spamming(AutomodModule):
     }
     message_count = 10
     message_rate = 12.0  # seconds
+    needs_content = False
 
     def __init__(self):
-        self.cooldown = commands.CooldownMapping.from_cooldown(
-            self.message_count, self.message_rate, commands.BucketType.member
+        self.cooldown = commands.CooldownMapping(
+            MessageTrackingCooldown(self.message_count, self.message_rate), commands.BucketType.member
         )
-        self.catching_cooldown = commands.CooldownMapping.from_cooldown(
-            self.message_count,
-            self.message_rate,
-            lambda msg: (commands.BucketType.channel(msg), commands.BucketType.member(msg)),
+        self.catching_cooldown = commands.CooldownMapping(
+            MessageTrackingCooldown(self.message_count, self.message_rate),
+            channel_member_key,
         )
 
-    async def check(self, ctx):
-        cooldown = (
-            self.catching_cooldown
-            if (ctx.channel.category and ctx.channel.category.id == CATCHING_CATEGORY_ID)
-            else self.cooldown
-        )
+    async def check(self, ctx, content):
+        if ctx.channel.category_id == CATCHING_CATEGORY_ID:
+            cooldown = self.catching_cooldown
+        else:
+            cooldown = self.cooldown
 
         bucket = cooldown.get_bucket(ctx.message)
+        bucket.messages.append(ctx.message)
         if bucket.update_rate_limit():
-            cooldown._cache[cooldown._bucket_key(ctx.message)].reset()
-            await ctx.channel.purge(limit=self.message_count, check=lambda m: m.author == ctx.author)
+            # Edits are counted too, so the same message can be tracked more than once
+            messages = {x.id: x for x in bucket.messages if x.channel == ctx.channel}
+            bucket.messages.clear()
+            bucket.reset()
+            with suppress(discord.HTTPException):
+                await ctx.channel.delete_messages(messages.values())
             return "Spamming"
 
 
@@ -158,26 +267,71 @@ class Automod(commands.Cog):
         self.bot = bot
         self.banned_words = BannedWords(bot)
         self.modules = [self.banned_words, ServerInvites(bot), MassMention(), Spamming()]
+        self.contentless_modules = [x for x in self.modules if not x.needs_content]
+        self._task = bot.loop.create_task(self.watch_invalidations())
+
+    async def cog_load(self):
+        await self.bot.mongo.db.action.create_index(
+            [("guild_id", 1), ("target_id", 1), ("automod_bucket", 1), ("created_at", -1)]
+        )
+
+    async def cog_unload(self):
+        self._task.cancel()
+
+    async def watch_invalidations(self):
+        await self.bot.get_cog("Redis").wait_until_ready()
+        while True:
+            try:
+                await self.banned_words.watch_invalidations()
+            except asyncio.CancelledError:
+                return
+            except Exception:
+                self.bot.log.exception("Ignoring exception in watch banned words invalidations")
+                await asyncio.sleep(5)
 
     @commands.Cog.listener(name="on_message")
     @commands.Cog.listener(name="on_message_edit")
     async def on_message(self, *args):
         message = args[-1]
 
+        # Cheapest checks first, the permissions check has to go through the member's roles
         if (
-            message.guild is None
+            message.author.bot
+            or message.is_system()
+            or message.guild is None
             or message.guild.id == constants.SUPPORT_SERVER_ID
             or not isinstance(message.author, discord.Member)
-            or message.author.bot
             or message.channel.permissions_for(message.author).manage_messages
         ):
             return
 
-        ctx = await self.bot.get_context(message)
-        for module in self.modules:
-            if reason := await module.check(ctx):
+        # Messages without content (e.g. stickers or attachments) can only be caught for spamming
+        if message.content:
+            modules = self.modules
+            # Casefolded once per message and shared by all modules
+            content = message.content.casefold()
+        else:
+            modules = self.contentless_modules
+            content = None
+
+        ctx = FakeContext.from_message(self.bot, message)
+        for module in modules:
+            if reason := await module.check(ctx, content):
                 await self.automod_punish(ctx, module, reason=reason)
 
+    async def fetch_offense_count(self, ctx, module, now):
+        """Returns the number of times the author was punished by a module in the past week."""
+
+        query = {
+            "target_id": ctx.author.id,
+            "user_id": self.bot.user.id,
+            "guild_id": ctx.guild.id,
+            "created_at": {"$gt": now - timedelta(weeks=1)},
+            "automod_bucket": module.bucket,
+        }
+        # Past the highest tier the punishment stays the same, so there's no need to count further
+        return await self.bot.mongo.db.action.count_documents(query, limit=len(module.tiers) - 1)
+
     async def automod_punish(self, ctx, module, *, reason):
         with suppress(discord.Forbidden, discord.HTTPException):
             await ctx.message.delete()
@@ -186,27 +340,21 @@ class Automod(commands.Cog):
         if cog is None:
             return
 
-        query = {
-            "target_id": ctx.author.id,
-            "user_id": self.bot.user.id,
-            "guild_id": ctx.guild.id,
-            "created_at": {"$gt": datetime.now(timezone.utc) - timedelta(weeks=1)},
-            "automod_bucket": module.bucket,
-        }
-        count = await self.bot.mongo.db.action.count_documents(query)
+        now = datetime.now(timezone.utc)
+        count = await self.fetch_offense_count(ctx, module, now)
 
         kwargs = dict(
             target=ctx.author,
             user=self.bot.user,
             reason=f"Automod: {reason}",
             guild_id=ctx.guild.id,
-            created_at=datetime.now(timezone.utc),
+            created_at=now,
             automod_bucket=module.bucket,
         )
 
-        type, duration = next(x for c, x in module.punishments.items() if count >= c)
+        type, duration = module.punishment_for(count)
         if duration is not None:
-            kwargs["expires_at"] = kwargs["created_at"] + duration
+            kwargs["expires_at"] = now + duration
 
         action = cog.cls_dict[type](**kwargs)
         await action.notify()
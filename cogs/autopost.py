@@ -1,6 +1,3 @@
-import itertools
-import textwrap
-from collections import defaultdict
 from typing import List
 
 from discord.ext import commands, tasks
@@ -8,34 +5,57 @@ from discord.ext import commands, tasks
 
 class AutoPost:
     def __init__(self, channels: List[int], message: str, *, each: int = 1, delete_last: bool = False):
-        self.do_post = itertools.cycle([True] + [False] * (each - 1))
-        self.channels = itertools.cycle(channels)
-        self.message = textwrap.dedent(message).strip()
+        self.each = each
+        self.counter = 0
+        self.channels = tuple(channels)
+        self.channel_idx = 0
+        self.message = message
 
         self.delete_last = delete_last
         self.last_message = None
 
+    def next_channel_id(self):
+        """Returns the channel to post in on this tick, or None if this tick should be skipped."""
+
+        do_post = self.counter == 0
+        self.counter = (self.counter + 1) % self.each
+        if not do_post:
+            return None
+
+        channel_id = self.channels[self.channel_idx]
+        self.channel_idx = (self.channel_idx + 1) % len(self.channels)
+        return channel_id
+
+
+TRADING_MESSAGE = """\
+**Reminder:** It is your own responsibility to evaluate trades you make. Once both parties have agreed to and completed a trade, that trade is final. If you change your mind after you make a trade, nothing can nor will be done.
+
+To ensure you get a fair deal, you are highly encouraged to do the following:
+
+• Research trades, market listings, and auctions with similar pokémon from the past.
+• Ask for other trainers' opinions if unsure about the fairness of a trade.
+• Don't give into pressure to buy or sell immediately. You can always try again later.
+• Read through the trading tips document linked in the <#754774504571666534> channel."""
+
+ADVERTISING_MESSAGE = """\
+**Reminder:** Check pins for full rules. Advertisements in violation will be removed."""
+
+CATCHING_MESSAGE = """\
+**Reminder:** This channel is for catching only.
+
+• Spamming is not allowed here or anywhere else in the server.
+• Do not run generic bot commands here, there are multiple channels for that. <#720029048381767751> and <#784148997593890836>
+• Auctions and market advertisements are not allowed. Use <#741712512113967214> and <#768161635096461362>."""
 
 POSTS = [
     AutoPost(
         [720040664741576775, 721778540080791569, 721846241696284694, 778139533945602078],
-        """
-        **Reminder:** It is your own responsibility to evaluate trades you make. Once both parties have agreed to and completed a trade, that trade is final. If you change your mind after you make a trade, nothing can nor will be done.
-
-        To ensure you get a fair deal, you are highly encouraged to do the following:
-
-        • Research trades, market listings, and auctions with similar pokémon from the past.
-        • Ask for other trainers' opinions if unsure about the fairness of a trade.
-        • Don't give into pressure to buy or sell immediately. You can always try again later.
-        • Read through the trading tips document linked in the <#754774504571666534> channel.
-        """,
+        TRADING_MESSAGE,
         delete_last=True,
     ),
     AutoPost(
         [741712512113967214],
-        """
-        **Reminder:** Check pins for full rules. Advertisements in violation will be removed.
-        """,
+        ADVERTISING_MESSAGE,
         each=6,
     ),
     AutoPost(
@@ -46,13 +66,7 @@ POSTS = [
             724762012453961810,
             724762035094683718,
         ],
-        """
-        **Reminder:** This channel is for catching only.
-
-        • Spamming is not allowed here or anywhere else in the server.
-        • Do not run generic bot commands here, there are multiple channels for that. <#720029048381767751> and <#784148997593890836>
-        • Auctions and market advertisements are not allowed. Use <#741712512113967214> and <#768161635096461362>.
-        """,
+        CATCHING_MESSAGE,
         delete_last=True,
     ),
 ]
@@ -64,30 +78,31 @@ class PriceCheck(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.posts = POSTS
-        self.updated = defaultdict(bool)
+        self.tracked_channel_ids = frozenset(x for post in self.posts for x in post.channels)
+        self.updated = set()
         self.autopost.start()
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author == self.bot.user:
+        if message.channel.id not in self.tracked_channel_ids or message.author == self.bot.user:
             return
-        self.updated[message.channel.id] = True
+        self.updated.add(message.channel.id)
 
     @tasks.loop(seconds=30)
     async def autopost(self):
         for post in self.posts:
-            if not next(post.do_post):
+            channel_id = post.next_channel_id()
+            if channel_id is None:
                 continue
 
-            channel_id = next(post.channels)
-            if self.updated[channel_id]:
+            if channel_id in self.updated:
                 channel = self.bot.get_channel(channel_id)
 
                 if post.delete_last and post.last_message:
                     await post.last_message.delete()
 
                 post.last_message = await channel.send(post.message)
-                self.updated[channel_id] = False
+                self.updated.discard(channel_id)
 
     @autopost.before_loop
     async def before_autopost(self):
@@ -1,5 +1,3 @@
-import sys
-import traceback
 from datetime import timedelta
 
 import discord
@@ -8,6 +6,8 @@ from discord.ext import commands
 from helpers import time
 from helpers.utils import FetchUserConverter
 
+PERMISSION_NAME_TRANSLATION = str.maketrans("_", " ")
+
 
 def format_date(date):
     if date is None:
@@ -21,65 +21,89 @@ class Bot(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.Cog.listener()
-    async def on_command_error(self, ctx, error):
-        if isinstance(error, commands.NoPrivateMessage):
-            await ctx.send("This command cannot be used in private messages.", ephemeral=True)
-        elif isinstance(error, commands.DisabledCommand):
-            await ctx.send("Sorry. This command is disabled and cannot be used.", ephemeral=True)
-        elif isinstance(error, commands.BotMissingPermissions):
-            missing = [
-                "`" + perm.replace("_", " ").replace("guild", "server").title() + "`"
-                for perm in error.missing_permissions
-            ]
-            fmt = "\n".join(missing)
-            message = (
-                f"💥 Err, I need the following permissions to run this command:\n{fmt}\nPlease fix this and try again."
-            )
-            try:
-                await ctx.send(message, ephemeral=True)
-            except discord.Forbidden:
-                await ctx.author.send(message)
-        elif isinstance(error, commands.MissingRequiredArgument):
-            await ctx.send_help(ctx.command)
-        elif isinstance(error, commands.CommandOnCooldown):
-            await ctx.send(
-                f"You're on cooldown! Try again in **{time.human_timedelta(timedelta(seconds=error.retry_after))}**.",
-                ephemeral=True,
-            )
-        if isinstance(error, commands.CommandInvokeError) and "private_variable" in str(error.original):
-            await ctx.send(error.original, ephemeral=True)
-        elif isinstance(error, commands.BadFlagArgument):
-            if isinstance(error.original, commands.ConversionError):
-                return await ctx.send(error.original.original, ephemeral=True)
+    async def handle_no_private_message(self, ctx, error):
+        await ctx.send("This command cannot be used in private messages.", ephemeral=True)
+
+    async def handle_disabled_command(self, ctx, error):
+        await ctx.send("Sorry. This command is disabled and cannot be used.", ephemeral=True)
+
+    async def handle_bot_missing_permissions(self, ctx, error):
+        fmt = "\n".join(
+            f"`{perm.translate(PERMISSION_NAME_TRANSLATION).replace('guild', 'server').title()}`"
+            for perm in error.missing_permissions
+        )
+        message = f"💥 Err, I need the following permissions to run this command:\n{fmt}\nPlease fix this and try again."
+        try:
+            await ctx.send(message, ephemeral=True)
+        except discord.Forbidden:
+            await ctx.author.send(message)
+
+    async def handle_missing_required_argument(self, ctx, error):
+        await ctx.send_help(ctx.command)
+
+    async def handle_command_on_cooldown(self, ctx, error):
+        await ctx.send(
+            f"You're on cooldown! Try again in **{time.human_timedelta(timedelta(seconds=error.retry_after))}**.",
+            ephemeral=True,
+        )
+
+    async def handle_command_invoke_error(self, ctx, error):
+        if "private_variable" in str(error.original):
             await ctx.send(error.original, ephemeral=True)
-        elif isinstance(error, commands.CheckAnyFailure):
-            await ctx.send(error.errors[-1], ephemeral=True)
-        elif isinstance(error, commands.CheckFailure):
-            await ctx.send(error, ephemeral=True)
-        elif isinstance(error, commands.UserInputError):
-            await ctx.send(error, ephemeral=True)
-        elif isinstance(error, commands.CommandNotFound):
-            return
         else:
-            print(f"Ignoring exception in command {ctx.command}")
-            traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+            self.log_command_error(ctx, error)
+
+    async def handle_bad_flag_argument(self, ctx, error):
+        if isinstance(error.original, commands.ConversionError):
+            return await ctx.send(error.original.original, ephemeral=True)
+        await ctx.send(error.original, ephemeral=True)
+
+    async def handle_check_any_failure(self, ctx, error):
+        await ctx.send(error.errors[-1], ephemeral=True)
+
+    async def handle_user_error(self, ctx, error):
+        await ctx.send(error, ephemeral=True)
+
+    async def handle_command_not_found(self, ctx, error):
+        pass
+
+    # Looked up along the error's MRO, so the most specific handler wins
+    error_handlers = {
+        commands.NoPrivateMessage: handle_no_private_message,
+        commands.DisabledCommand: handle_disabled_command,
+        commands.BotMissingPermissions: handle_bot_missing_permissions,
+        commands.MissingRequiredArgument: handle_missing_required_argument,
+        commands.CommandOnCooldown: handle_command_on_cooldown,
+        commands.CommandInvokeError: handle_command_invoke_error,
+        commands.BadFlagArgument: handle_bad_flag_argument,
+        commands.CheckAnyFailure: handle_check_any_failure,
+        commands.CheckFailure: handle_user_error,
+        commands.UserInputError: handle_user_error,
+        commands.CommandNotFound: handle_command_not_found,
+    }
+
+    def log_command_error(self, ctx, error):
+        self.bot.log.error("Ignoring exception in command %s", ctx.command, exc_info=error)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        for cls in type(error).__mro__:
+            if handler := self.error_handlers.get(cls):
+                return await handler(self, ctx, error)
+        self.log_command_error(ctx, error)
 
     @commands.Cog.listener()
     async def on_error(self, event, error):
         if isinstance(error, discord.NotFound):
             return
         else:
-            print(f"Ignoring exception in event {event}:")
-            traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+            self.bot.log.error("Ignoring exception in event %s", event, exc_info=error)
 
     @commands.hybrid_command()
     async def ping(self, ctx):
         """View the bot's latency."""
 
-        message = await ctx.send("Pong!")
-        seconds = (message.created_at - ctx.message.created_at).total_seconds()
-        await message.edit(content=f"Pong! **{seconds * 1000:.0f} ms**")
+        await ctx.send(f"Pong! **{ctx.bot.latency * 1000:.0f} ms**")
 
     @commands.hybrid_command(aliases=("whois",))
     async def info(self, ctx, *, user: FetchUserConverter = None):
@@ -106,10 +130,12 @@ class Bot(commands.Cog):
         )
 
         if isinstance(user, discord.Member):
-            roles = [role.name.replace("@", "@\u200b") for role in user.roles]
+            # Member.roles sorts the roles every time it's accessed
+            roles = user.roles
+            names = [role.name.replace("@", "@\u200b") for role in roles[: 9 if len(roles) > 10 else 10]]
             if len(roles) > 10:
-                roles = [*roles[:9], f"and {len(roles) - 9} more"]
-            embed.add_field(name="Roles", value=", ".join(roles), inline=False)
+                names.append(f"and {len(roles) - 9} more")
+            embed.add_field(name="Roles", value=", ".join(names), inline=False)
         else:
             embed.set_footer(text="This user is not in this server.")
 
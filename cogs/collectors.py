@@ -1,10 +1,17 @@
+from operator import attrgetter
+
 import discord
 from discord.ext import commands
 from discord.ext.menus.views import ViewMenuPages
 
 from helpers import checks
 from helpers.converters import SpeciesConverter
-from helpers.pagination import AsyncEmbedListPageSource
+from helpers.pagination import AsyncEmbedListPageSource, EmbedListPageSource
+
+
+def format_collector(user):
+    mention = f"<@{user.id}>"
+    return f"{user} {mention} `{mention}`"
 
 
 class Collectors(commands.Cog):
@@ -13,11 +20,12 @@ class Collectors(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def doc_to_species(self, doc):
-        for x in doc.keys():
-            if x == "_id":
-                continue
-            yield self.bot.data.species_by_number(int(x))
+    async def cog_load(self):
+        await self.bot.mongo.db.collector.create_index([("species", 1)])
+
+    def doc_to_species(self, doc):
+        data = self.bot.data
+        return [data.species_by_number(x) for x in doc.get("species", [])]
 
     @commands.hybrid_group(aliases=("col",), fallback="list")
     @checks.community_server_only()
@@ -31,19 +39,18 @@ class Collectors(commands.Cog):
             member = ctx.author
 
         result = await self.bot.mongo.db.collector.find_one({"_id": member.id})
+        species = self.doc_to_species(result or {})
+        if len(species) == 0:
+            return await ctx.send("No pokémon found.")
 
         pages = ViewMenuPages(
-            source=AsyncEmbedListPageSource(
-                self.doc_to_species(result or {}),
+            source=EmbedListPageSource(
+                species,
                 title=str(member),
-                format_item=lambda x: x.name,
+                format_item=attrgetter("name"),
             )
         )
-
-        try:
-            await pages.start(ctx)
-        except IndexError:
-            await ctx.send("No pokémon found.")
+        await pages.start(ctx)
 
     @collect.command()
     @checks.community_server_only()
@@ -52,7 +59,7 @@ class Collectors(commands.Cog):
 
         result = await self.bot.mongo.db.collector.update_one(
             {"_id": ctx.author.id},
-            {"$set": {str(species.id): True}},
+            {"$addToSet": {"species": species.id}},
             upsert=True,
         )
 
@@ -68,7 +75,7 @@ class Collectors(commands.Cog):
 
         result = await self.bot.mongo.db.collector.update_one(
             {"_id": ctx.author.id},
-            {"$unset": {str(species.id): 1}},
+            {"$pull": {"species": species.id}},
         )
 
         if result.modified_count > 0:
@@ -85,7 +92,7 @@ class Collectors(commands.Cog):
         await ctx.send("Cleared your collecting list.")
 
     async def query_collectors(self, species):
-        async for x in self.bot.mongo.db.collector.find({str(species.id): True}):
+        async for x in self.bot.mongo.db.collector.find({"species": species.id}, {"_id": 1}):
             user = self.bot.get_user(x["_id"])
             if user is None:
                 continue
@@ -96,14 +103,11 @@ class Collectors(commands.Cog):
     async def search(self, ctx, *, species: SpeciesConverter):
         """Lists the collectors of a pokémon species."""
 
-        def format_item(user):
-            return f"{user} {user.mention} `<@{user.id}>`"
-
         pages = ViewMenuPages(
             source=AsyncEmbedListPageSource(
                 self.query_collectors(species),
                 title=str(species),
-                format_item=format_item,
+                format_item=format_collector,
             )
         )
 
@@ -119,6 +123,39 @@ class Collectors(commands.Cog):
 
         await ctx.invoke(self.search, species=species)
 
+    @commands.command()
+    @commands.is_owner()
+    async def migratecollectors(self, ctx):
+        """Moves collecting lists stored as one {species_id: True} field per species into the species array."""
+
+        result = await self.bot.mongo.db.collector.update_many(
+            {"species": {"$exists": False}},
+            [
+                {
+                    "$set": {
+                        "species": {
+                            "$map": {
+                                "input": {
+                                    "$filter": {
+                                        "input": {"$objectToArray": "$$ROOT"},
+                                        "cond": {
+                                            "$and": [
+                                                {"$eq": ["$$this.v", True]},
+                                                {"$regexMatch": {"input": "$$this.k", "regex": "^[0-9]+$"}},
+                                            ]
+                                        },
+                                    }
+                                },
+                                "in": {"$toInt": "$$this.k"},
+                            }
+                        }
+                    }
+                },
+                {"$project": {"species": 1}},
+            ],
+        )
+        await ctx.send(f"Migrated {result.modified_count} collecting lists.")
+
 
 async def setup(bot):
     await bot.add_cog(Collectors(bot))
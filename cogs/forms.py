@@ -1,6 +1,4 @@
 import asyncio
-import sys
-import traceback
 from enum import Enum
 
 import discord
@@ -19,26 +17,31 @@ class SubmissionStatus(Enum):
 
 
 CHANNEL_ID = 888320631890931732
-
-COLORS = {
-    SubmissionStatus.UNDER_REVIEW.value: None,
-    SubmissionStatus.REJECTED.value: discord.Color.red(),
-    SubmissionStatus.ACCEPTED.value: discord.Color.green(),
-    SubmissionStatus.MARKED_ORANGE.value: discord.Color.orange(),
-    SubmissionStatus.MARKED_YELLOW.value: discord.Color.yellow(),
-    SubmissionStatus.MARKED_BLUE.value: discord.Color.blue(),
-    SubmissionStatus.MARKED_PURPLE.value: discord.Color.purple(),
-}
-
-TEXT = {
-    SubmissionStatus.UNDER_REVIEW.value: "New Form Submission",
-    SubmissionStatus.REJECTED.value: "Rejected",
-    SubmissionStatus.ACCEPTED.value: "Accepted",
-    SubmissionStatus.MARKED_ORANGE.value: "Marked for Review (Orange)",
-    SubmissionStatus.MARKED_YELLOW.value: "Marked for Review (Yellow)",
-    SubmissionStatus.MARKED_BLUE.value: "Marked for Review (Blue)",
-    SubmissionStatus.MARKED_PURPLE.value: "Marked for Review (Purple)",
-}
+WORKER_COUNT = 4
+
+# The only fields of a submission that are used to build its embed
+SUBMISSION_FIELDS = ("_id", "form_id", "user_id", "user_tag", "status", "reviewer_id", "embedded_id")
+
+# Status values are contiguous, so these are indexed by them directly
+COLORS = (
+    None,  # UNDER_REVIEW
+    discord.Color.red(),  # REJECTED
+    discord.Color.green(),  # ACCEPTED
+    discord.Color.blue(),  # MARKED_BLUE
+    discord.Color.orange(),  # MARKED_ORANGE
+    discord.Color.yellow(),  # MARKED_YELLOW
+    discord.Color.purple(),  # MARKED_PURPLE
+)
+
+TEXT = (
+    "New Form Submission",
+    "Rejected",
+    "Accepted",
+    "Marked for Review (Blue)",
+    "Marked for Review (Orange)",
+    "Marked for Review (Yellow)",
+    "Marked for Review (Purple)",
+)
 
 
 class Forms(commands.Cog):
@@ -46,10 +49,14 @@ class Forms(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self._queues = [asyncio.Queue(maxsize=256) for _ in range(WORKER_COUNT)]
+        self._workers = [bot.loop.create_task(self.process_submissions(x)) for x in self._queues]
         self._task = bot.loop.create_task(self.watch_submissions())
 
     async def cog_unload(self):
         self._task.cancel()
+        for worker in self._workers:
+            worker.cancel()
 
     async def send_submission(self, channel, submission):
         status = submission.get("status", 0)
@@ -67,32 +74,59 @@ class Forms(commands.Cog):
             reviewer = self.bot.get_user(reviewer_id) or FakeUser(reviewer_id)
             embed.set_footer(text=embed.footer.text + f"\nReviewed by • {reviewer}")
 
-        if embedded_id := submission.get("embedded_id"):
-            message = await channel.fetch_message(embedded_id)
-            return await message.edit(embed=embed)
+        embedded_id = submission.get("embedded_id")
+        if embedded_id is None:
+            # The event's document may have been read before an earlier event for this submission was posted
+            stored = await self.bot.mongo.db.submission.find_one({"_id": submission["_id"]}, {"embedded_id": 1})
+            embedded_id = stored and stored.get("embedded_id")
+
+        if embedded_id:
+            return await channel.get_partial_message(embedded_id).edit(embed=embed)
         else:
             message = await channel.send(embed=embed)
             await self.bot.mongo.db.submission.update_one(
                 {"_id": submission["_id"]}, {"$set": {"embedded_id": message.id}}
             )
 
-    async def _watch_submissions(self, channel):
+    async def process_submissions(self, queue):
+        await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(CHANNEL_ID)
+        while True:
+            submission = await queue.get()
+            try:
+                await self.send_submission(channel, submission)
+            except Exception:
+                self.bot.log.exception("Ignoring exception in send submission")
+
+    async def _watch_submissions(self):
         coll = self.bot.mongo.db.submission
-        pipeline = [{"$match": {"operationType": {"$in": ["insert", "replace", "update"]}}}]
+        pipeline = [
+            {
+                "$match": {
+                    "$or": [
+                        {"operationType": {"$in": ["insert", "replace"]}},
+                        # Skip our own writes of embedded_id, the embed is already up to date
+                        {"operationType": "update", "updateDescription.updatedFields.embedded_id": {"$exists": False}},
+                    ]
+                }
+            },
+            # The event's own _id is kept implicitly, it's the resume token
+            {"$project": {f"fullDocument.{x}": 1 for x in SUBMISSION_FIELDS}},
+        ]
         async for change in coll.watch(pipeline, full_document="updateLookup"):
-            await self.send_submission(channel, change["fullDocument"])
+            submission = change["fullDocument"]
+            # Changes to the same submission always go to the same worker, so they're applied in order
+            await self._queues[hash(submission["_id"]) % WORKER_COUNT].put(submission)
 
     async def watch_submissions(self):
         await self.bot.wait_until_ready()
-        channel = self.bot.get_channel(CHANNEL_ID)
         while True:
             try:
-                await self._watch_submissions(channel)
+                await self._watch_submissions()
             except asyncio.CancelledError:
                 return
-            except Exception as error:
-                print("Ignoring exception in watch submissions")
-                traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+            except Exception:
+                self.bot.log.exception("Ignoring exception in watch submissions")
 
 
 async def setup(bot):
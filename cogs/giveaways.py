@@ -1,4 +1,6 @@
 import asyncio
+import random
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import NamedTuple, Optional
@@ -6,11 +8,36 @@ from typing import NamedTuple, Optional
 import discord
 from bson.objectid import ObjectId
 from discord.ext import commands, tasks
+from pymongo import UpdateOne
 from pymongo.errors import DuplicateKeyError
 
-from helpers.poketwo import format_pokemon, format_pokemon_details
+from helpers.poketwo import IV_FLAGS, format_pokemon, format_pokemon_details
 from helpers.utils import FakeUser
 
+# Added to a giveaway's entrants set once it has been filled from Mongo, so the set can be used for counting
+ENTRANTS_SEEDED_MARKER = "seeded"
+
+REGIONAL_FORM_SUFFIXES = ("-alola", "-galar", "-hisui", "-paldea")
+
+# The fields read by Giveaway.build_from_mongo
+GIVEAWAY_PROJECTION = {
+    x: 1
+    for x in (
+        "guild_id",
+        "user_id",
+        "pokemon_ids",
+        "approval_status",
+        "description",
+        "channel_id",
+        "message_id",
+        "ends_at",
+        "winner_id",
+    )
+}
+
+# The fields used to display a giveaway's pokémon
+POKEMON_PROJECTION = {x: 1 for x in ("species_id", "shiny", "level", "iv_total", *IV_FLAGS)}
+
 
 @dataclass
 class Giveaway:
@@ -56,7 +83,7 @@ class Giveaway:
     @property
     async def pokemon(self):
         if self._pokemon is None:
-            cursor = self.bot.mongo.poketwo_db.pokemon.find({"_id": {"$in": self.pokemon_ids}})
+            cursor = self.bot.mongo.poketwo_db.pokemon.find({"_id": {"$in": self.pokemon_ids}}, POKEMON_PROJECTION)
             self._pokemon = await cursor.to_list(None)
         return self._pokemon
 
@@ -111,8 +138,27 @@ class Giveaway:
             embed.add_field(name="Message", value=self.description)
         return embed
 
+    async def fetch_num_entries(self):
+        """Returns the number of entries, from the entrants set kept in Redis while the giveaway is running."""
+
+        remaining = int((self.ends_at - datetime.now(timezone.utc)).total_seconds())
+        if remaining <= 0:
+            return await self.bot.mongo.db.giveaway_entry.count_documents({"giveaway_id": self._id})
+
+        key = f"giveaway_entrants:{self._id}"
+        if not await self.bot.redis.sismember(key, ENTRANTS_SEEDED_MARKER):
+            # Adding to a set is idempotent, so people joining while this runs are neither lost nor counted twice
+            user_ids = await self.bot.mongo.db.giveaway_entry.distinct("user_id", {"giveaway_id": self._id})
+            tr = self.bot.redis.multi_exec()
+            tr.sadd(key, ENTRANTS_SEEDED_MARKER, *user_ids)
+            tr.expire(key, remaining + 1)
+            await tr.execute()
+
+        return max(await self.bot.redis.scard(key) - 1, 0)
+
     async def giveaway_embed(self):
-        num_entries = await self.bot.mongo.db.giveaway_entry.count_documents({"giveaway_id": self._id})
+        num_entries = await self.fetch_num_entries()
+        pokemon = await self.pokemon
 
         details = [
             f"Ends: {discord.utils.format_dt(self.ends_at, 'R')} ({discord.utils.format_dt(self.ends_at, 'f')})",
@@ -120,8 +166,8 @@ class Giveaway:
         ]
 
         embed = discord.Embed(
-            title=await self.title(),
-            description="\n".join(i for x in await self.pokemon for i in format_pokemon_details(self.bot, x)),
+            title=", ".join(format_pokemon(self.bot, x) for x in pokemon),
+            description="\n".join(i for x in pokemon for i in format_pokemon_details(self.bot, x)),
             timestamp=self.ends_at,
         )
         embed.set_author(name=str(self.user), icon_url=self.user.display_avatar.url)
@@ -138,11 +184,11 @@ class Giveaway:
 
         embed.add_field(name="Details", value="\n".join(details))
 
-        pokemon, *_ = await self.pokemon
-        if pokemon.get("shiny"):
-            embed.set_thumbnail(url=f"https://cdn.poketwo.net/shiny/{pokemon['species_id']}.png")
+        first = pokemon[0]
+        if first.get("shiny"):
+            embed.set_thumbnail(url=f"https://cdn.poketwo.net/shiny/{first['species_id']}.png")
         else:
-            embed.set_thumbnail(url=f"https://cdn.poketwo.net/images/{pokemon['species_id']}.png")
+            embed.set_thumbnail(url=f"https://cdn.poketwo.net/images/{first['species_id']}.png")
 
         return embed
 
@@ -153,11 +199,12 @@ class Giveaway:
         if guild_data is None or guild_data.get("giveaway_approval_channel_id") is None:
             raise ValueError("Guild does not have giveaways set up.")
 
+        cursor = self.bot.mongo.poketwo_db.pokemon.find(
+            {"owned_by": "user", "owner_id": self.user.id, "_id": {"$in": self.pokemon_ids}}, {"_id": 1}
+        )
+        found = {x["_id"] async for x in cursor}
         for pokemon_id in self.pokemon_ids:
-            pokemon = await self.bot.mongo.poketwo_db.pokemon.find_one(
-                {"owned_by": "user", "owner_id": self.user.id, "_id": pokemon_id}
-            )
-            if pokemon is None:
+            if pokemon_id not in found:
                 raise ValueError(f"Couldn't find the pokemon with ID {pokemon_id}!")
 
         channel = self.bot.get_channel(guild_data["giveaway_approval_channel_id"])
@@ -178,12 +225,13 @@ class Giveaway:
         """Sends the Pokémon to a user."""
 
         idx = await self.bot.mongo.fetch_next_idx(user, reserve=len(self.pokemon_ids))
-        for pokemon_id in self.pokemon_ids:
-            await self.bot.mongo.poketwo_db.pokemon.update_one(
-                {"_id": pokemon_id},
-                {"$set": {"idx": idx, "owned_by": "user", "owner_id": user.id}},
-            )
-            idx += 1
+        await self.bot.mongo.poketwo_db.pokemon.bulk_write(
+            [
+                UpdateOne({"_id": pokemon_id}, {"$set": {"idx": idx + i, "owned_by": "user", "owner_id": user.id}})
+                for i, pokemon_id in enumerate(self.pokemon_ids)
+            ],
+            ordered=False,
+        )
 
     async def start(self, channel: discord.TextChannel):
         """Starts a giveaway, sending the message and adding the button."""
@@ -204,16 +252,19 @@ class Giveaway:
             {"$set": {"ends_at": self.ends_at, "channel_id": channel.id, "message_id": message.id}},
         )
 
+    async def pick_winner_entry(self):
+        """Picks a random entry by skipping along the giveaway_id index, rather than sampling with a random sort."""
+
+        query = {"giveaway_id": self._id}
+        if num_entries := await self.bot.mongo.db.giveaway_entry.count_documents(query):
+            cursor = self.bot.mongo.db.giveaway_entry.find(query).skip(random.randrange(num_entries)).limit(1)
+            return await cursor.to_list(1)
+        return []
+
     async def end(self):
         """Ends a giveaway."""
 
-        if winner := await self.bot.mongo.db.giveaway_entry.aggregate(
-            [
-                {"$match": {"giveaway_id": self._id}},
-                {"$sample": {"size": 1}},
-            ],
-            allowDiskUse=True,
-        ).to_list(1):
+        if winner := await self.pick_winner_entry():
             self.winner = self.guild.get_member(winner[0]["user_id"]) or FakeUser(winner[0]["user_id"])
             await self.bot.mongo.db.giveaway.update_one({"_id": self._id}, {"$set": {"winner_id": self.winner.id}})
             await self.send_pokemon_to_user(self.winner)
@@ -238,10 +289,6 @@ class Giveaway:
     async def update_embed(self):
         """Updates the giveaway embed."""
 
-        if await self.bot.redis.get(f"giveaway_embed_update:{self._id}") is not None:
-            return
-        await self.bot.redis.set(f"giveaway_embed_update:{self._id}", 1, expire=2)
-
         if message := await self.message:
             if self.ends_at < datetime.now(timezone.utc):
                 await message.edit(embed=await self.giveaway_embed(), view=None)
@@ -260,12 +307,17 @@ class GiveawayApproveButton(discord.ui.Button):
         self.giveaway = giveaway
 
     async def callback(self, interaction: discord.Interaction):
-        await self.bot.mongo.db.giveaway.update_one({"_id": self.giveaway._id}, {"$set": {"approval_status": True}})
+        result = await self.bot.mongo.db.giveaway.update_one(
+            {"_id": self.giveaway._id, "approval_status": None}, {"$set": {"approval_status": True}}
+        )
+        if result.modified_count == 0:
+            return await interaction.response.send_message("This giveaway has already been handled!", ephemeral=True)
 
         embed = await self.giveaway.approval_embed()
         embed.title = "Giveaway Request Approved"
         embed.color = discord.Color.green()
         await interaction.response.edit_message(embed=embed, view=None)
+        self.bot.loop.create_task(self.bot.get_cog("Giveaways").start_approved_giveaways())
         await self.giveaway.user.send(embed=embed)
 
 
@@ -280,7 +332,11 @@ class GiveawayDenyButton(discord.ui.Button):
         self.giveaway = giveaway
 
     async def callback(self, interaction: discord.Interaction):
-        await self.bot.mongo.db.giveaway.update_one({"_id": self.giveaway._id}, {"$set": {"approval_status": False}})
+        result = await self.bot.mongo.db.giveaway.update_one(
+            {"_id": self.giveaway._id, "approval_status": None}, {"$set": {"approval_status": False}}
+        )
+        if result.modified_count == 0:
+            return await interaction.response.send_message("This giveaway has already been handled!", ephemeral=True)
         await self.giveaway.send_pokemon_to_user(self.giveaway.user)
 
         embed = await self.giveaway.approval_embed()
@@ -297,18 +353,36 @@ class GiveawayJoinButton(discord.ui.Button):
         self.giveaway = giveaway
 
     async def callback(self, interaction: discord.Interaction):
-        if self.giveaway.ends_at < datetime.now(timezone.utc):
+        now = datetime.now(timezone.utc)
+        if self.giveaway.ends_at < now:
             return await interaction.response.send_message("This giveaway has already ended!", ephemeral=True)
 
+        # Entrants are also tracked in Redis so that repeated clicks don't have to go to Mongo
+        key = f"giveaway_entrants:{self.giveaway._id}"
+        if await self.bot.redis.sismember(key, interaction.user.id):
+            return await interaction.response.send_message("You have already joined this giveaway!", ephemeral=True)
+
         try:
             await self.bot.mongo.db.giveaway_entry.insert_one(
                 {"giveaway_id": self.giveaway._id, "user_id": interaction.user.id}
             )
         except DuplicateKeyError:
-            await interaction.response.send_message("You have already joined this giveaway!", ephemeral=True)
+            joined = False
         else:
+            joined = True
+
+        # Done before responding so that the entry is counted even if the interaction has expired
+        tr = self.bot.redis.multi_exec()
+        tr.sadd(key, interaction.user.id)
+        tr.expire(key, int((self.giveaway.ends_at - now).total_seconds()) + 1)
+        await tr.execute()
+
+        if joined:
             await interaction.response.send_message("You have joined this giveaway!", ephemeral=True)
-        await self.giveaway.update_embed()
+        else:
+            await interaction.response.send_message("You have already joined this giveaway!", ephemeral=True)
+
+        self.bot.get_cog("Giveaways").schedule_embed_update(self.giveaway)
 
 
 class GiveawayApprovalView(discord.ui.View):
@@ -340,6 +414,11 @@ class Giveaways(commands.Cog):
         self.bot = bot
         self.start_giveaways.start()
         self._current: Optional[DispatchedGiveaway] = None
+        self._embed_updates: dict[ObjectId, asyncio.Task] = {}
+        self._giveaways: dict[ObjectId, tuple[float, Giveaway]] = {}
+        self._giveaway_pokemon: dict[ObjectId, list[dict]] = {}
+        self._start_lock = asyncio.Lock()
+        self._rare_species: dict[int, bool] = {}
         self.bot.loop.create_task(self.update_current())
 
     async def cog_load(self):
@@ -350,24 +429,85 @@ class Giveaways(commands.Cog):
     async def cog_unload(self):
         self.start_giveaways.cancel()
         self.clear_current()
+        for task in self._embed_updates.values():
+            task.cancel()
+
+    def schedule_embed_update(self, giveaway: Giveaway):
+        """Updates a giveaway's embed after a delay, coalescing any other updates requested in the meantime."""
+
+        if giveaway._id in self._embed_updates:
+            return
+
+        # Giveaways with a long time left don't need their entry count to be as fresh
+        remaining = (giveaway.ends_at - datetime.now(timezone.utc)).total_seconds()
+        delay = min(60, max(5, remaining / 20))
+        self._embed_updates[giveaway._id] = self.bot.loop.create_task(self._update_embed_later(giveaway, delay))
+
+    async def _update_embed_later(self, giveaway: Giveaway, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            del self._embed_updates[giveaway._id]
+        # The giveaway might have ended in the meantime, so don't use a possibly stale copy
+        updated = await self.fetch_giveaway(giveaway._id)
+        if updated is None:
+            self._giveaway_pokemon.pop(giveaway._id, None)
+            return
+
+        # The pokémon themselves can't change while they're in escrow, so they're only loaded once per giveaway
+        if updated.ends_at > datetime.now(timezone.utc):
+            if (pokemon := self._giveaway_pokemon.get(giveaway._id)) is None:
+                pokemon = self._giveaway_pokemon[giveaway._id] = await updated.pokemon
+            updated._pokemon = pokemon
+        else:
+            # No more updates will be scheduled once it's over
+            self._giveaway_pokemon.pop(giveaway._id, None)
+
+        await updated.update_embed()
 
-    async def fetch_giveaway(self, _id: str | ObjectId):
+    async def fetch_giveaway(self, _id: str | ObjectId, *, cached: bool = False):
         if not isinstance(_id, ObjectId):
             _id = ObjectId(_id)
-        data = await self.bot.mongo.db.giveaway.find_one({"_id": _id})
-        if data is not None:
-            return Giveaway.build_from_mongo(self.bot, data)
+
+        now = time.monotonic()
+        if cached:
+            expires_at, giveaway = self._giveaways.get(_id, (0, None))
+            if expires_at > now:
+                return giveaway
+
+        data = await self.bot.mongo.db.giveaway.find_one({"_id": _id}, GIVEAWAY_PROJECTION)
+        if data is None:
+            return None
+
+        giveaway = Giveaway.build_from_mongo(self.bot, data)
+        # Once started, the only thing that changes is the winner, which joining doesn't look at
+        if giveaway.ends_at is not None:
+            self._giveaways = {k: v for k, v in self._giveaways.items() if v[0] > now}
+            self._giveaways[_id] = (now + 30, giveaway)
+        return giveaway
+
+    def is_rare_species(self, species_id):
+        if (rare := self._rare_species.get(species_id)) is None:
+            species = self.bot.data.species_by_number(species_id)
+            rare = self._rare_species[species_id] = (
+                species.mythical
+                or species.legendary
+                or species.ultra_beast
+                or species.event
+                or any(x in species.slug for x in REGIONAL_FORM_SUFFIXES)
+            )
+        return rare
 
     def validate_minimum_requirements(self, p):
-        species = self.bot.data.species_by_number(p["species_id"])
-        iv_total = p["iv_hp"] + p["iv_atk"] + p["iv_defn"] + p["iv_satk"] + p["iv_sdef"] + p["iv_spd"]
-        conditions = [
-            any((species.mythical, species.legendary, species.ultra_beast, "-alola" in species.slug, "-galar" in species.slug, "-hisui" in species.slug, "-paldea" in species.slug)) and iv_total >= 112,
-            species.event and iv_total >= 112,
-            iv_total >= 168 or iv_total <= 18,
-            p.get("shiny"),
-        ]
-        return any(conditions)
+        iv_total = p.get("iv_total")
+        if iv_total is None:
+            iv_total = sum(p[x] for x in IV_FLAGS)
+        return bool(
+            p.get("shiny")
+            or iv_total >= 168
+            or iv_total <= 18
+            or (iv_total >= 112 and self.is_rare_species(p["species_id"]))
+        )
 
     @commands.Cog.listener()
     async def on_interaction(self, interaction: discord.Interaction):
@@ -387,7 +527,7 @@ class Giveaways(commands.Cog):
         else:
             return
 
-        giveaway = await self.fetch_giveaway(giveaway_id)
+        giveaway = await self.fetch_giveaway(giveaway_id, cached=button_cls is GiveawayJoinButton)
         if giveaway is not None:
             await button_cls(giveaway).callback(interaction)
         else:
@@ -432,6 +572,7 @@ class Giveaways(commands.Cog):
     async def get_next_giveaway(self):
         if giveaway := await self.bot.mongo.db.giveaway.find_one(
             {"ends_at": {"$exists": True}, "winner_id": {"$exists": False}},
+            GIVEAWAY_PROJECTION,
             sort=[("ends_at", 1)],
         ):
             return Giveaway.build_from_mongo(self.bot, giveaway)
@@ -469,24 +610,44 @@ class Giveaways(commands.Cog):
         await giveaway.end()
         await giveaway.update_embed()
         self.bot.loop.create_task(self.update_current())
-
-    @tasks.loop(seconds=30)
+        # Its channel is free now, so the next approved giveaway can start there
+        self.bot.loop.create_task(self.start_approved_giveaways())
+
+    async def fetch_giveaway_channels(self, guild_id):
+        """Returns a guild's giveaway channel IDs, and the set of those that have a giveaway running."""
+
+        guild_data = await self.bot.mongo.db.guild.find_one({"_id": guild_id})
+        channel_ids = guild_data.get("giveaway_channel_ids", [])
+        query = {"channel_id": {"$in": channel_ids}, "ends_at": {"$exists": True}, "winner_id": {"$exists": False}}
+        return channel_ids, set(await self.bot.mongo.db.giveaway.distinct("channel_id", query))
+
+    async def start_approved_giveaways(self):
+        """Starts approved giveaways in any free giveaway channels."""
+
+        # Runs both from the loop and right after approvals, which mustn't start the same giveaway twice
+        async with self._start_lock:
+            giveaway_channels = {}
+            query = {"approval_status": True, "ends_at": {"$exists": False}}
+            async for giveaway in self.bot.mongo.db.giveaway.find(query, GIVEAWAY_PROJECTION):
+                giveaway = Giveaway.build_from_mongo(self.bot, giveaway)
+                guild = self.bot.get_guild(giveaway.guild_id)
+
+                if giveaway.guild_id not in giveaway_channels:
+                    giveaway_channels[giveaway.guild_id] = await self.fetch_giveaway_channels(giveaway.guild_id)
+                channel_ids, busy_channel_ids = giveaway_channels[giveaway.guild_id]
+
+                channel_id = next((x for x in channel_ids if x not in busy_channel_ids), None)
+                if channel_id is None:
+                    return
+
+                channel = guild.get_channel(channel_id)
+                await giveaway.start(channel)
+                busy_channel_ids.add(channel_id)
+                self.bot.loop.create_task(self.update_current(giveaway))
+
+    @tasks.loop(minutes=5)
     async def start_giveaways(self):
-        async for giveaway in self.bot.mongo.db.giveaway.find({"approval_status": True, "ends_at": {"$exists": False}}):
-            giveaway = Giveaway.build_from_mongo(self.bot, giveaway)
-            guild_data = await self.bot.mongo.db.guild.find_one({"_id": giveaway.guild_id})
-            guild = self.bot.get_guild(giveaway.guild_id)
-
-            for channel_id in guild_data.get("giveaway_channel_ids", []):
-                query = {"channel_id": channel_id, "ends_at": {"$exists": True}, "winner_id": {"$exists": False}}
-                if await self.bot.mongo.db.giveaway.find_one(query) is None:
-                    break
-            else:
-                return
-
-            channel = guild.get_channel(channel_id)
-            await giveaway.start(channel)
-            self.bot.loop.create_task(self.update_current(giveaway))
+        await self.start_approved_giveaways()
 
     @start_giveaways.before_loop
     async def before_check_giveaways(self):
@@ -36,12 +36,11 @@ class CustomHelpCommand(commands.HelpCommand):
         embed.title = title
         embed.description = description
 
-        counter = 0
-        for cog in cogs:
-            cog, description, command_list = cog
-            description = f"{description or 'No Description'} \n {''.join([f'`{command.qualified_name}` ' for command in command_list])}"
-            embed.add_field(name=cog.qualified_name, value=description, inline=False)
-            counter += 1
+        for cog, description, command_list in cogs:
+            command_names = " ".join(f"`{command.qualified_name}`" for command in command_list)
+            embed.add_field(
+                name=cog.qualified_name, value=f"{description or 'No Description'} \n {command_names}", inline=False
+            )
 
         return embed
 
@@ -56,10 +55,11 @@ class CustomHelpCommand(commands.HelpCommand):
         pages = []
         total = 0
 
-        filtered = await self.filter_commands(bot.commands, sort=True, key=get_category)
+        # Sorted by name within each category too, so the groups don't need sorting again
+        filtered = await self.filter_commands(bot.commands, sort=True, key=lambda c: (get_category(c), c.name))
 
         for cog_name, commands in itertools.groupby(filtered, key=get_category):
-            commands = sorted(commands, key=lambda c: c.name)
+            commands = list(commands)
 
             if len(commands) == 0:
                 continue
@@ -69,12 +69,12 @@ class CustomHelpCommand(commands.HelpCommand):
             description = (cog and cog.description) if (cog and cog.description) is not None else None
             pages.append((cog, description, commands))
 
-        async def get_page(pidx):
-            cogs = pages[min(len(pages) - 1, pidx * 6) : min(len(pages) - 1, pidx * 6 + 6)]
+        chunks = [pages[i : i + 6] for i in range(0, len(pages), 6)] or [[]]
 
+        async def get_page(pidx):
             embed = self.make_default_embed(
-                cogs,
-                title=f"Command Categories (Page {pidx+1}/{len(pages)//6+1})",
+                chunks[pidx],
+                title=f"Command Categories (Page {pidx+1}/{len(chunks)})",
                 description=(
                     f"Use `{self.context.clean_prefix}help <command>` for more info on a command.\n"
                     f"Use `{self.context.clean_prefix}help <category>` for more info on a category."
@@ -85,7 +85,7 @@ class CustomHelpCommand(commands.HelpCommand):
 
             return embed
 
-        paginator = pagination.Paginator(get_page, num_pages=len(pages) // 6 + 1)
+        paginator = pagination.Paginator(get_page, num_pages=len(chunks))
         await paginator.start(ctx)
 
     async def send_cog_help(self, cog):
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import abc
+import asyncio
 import contextlib
 import textwrap
+from collections import OrderedDict
 from dataclasses import MISSING, dataclass, field
 from datetime import datetime, timedelta, timezone
 from functools import cached_property
@@ -16,6 +18,21 @@ from helpers.utils import FakeUser
 
 ALL_CATEGORIES: dict[str, Type[HelpDeskCategory]] = {}
 
+TRIAL_MODERATOR_ROLE_IDS = frozenset(constants.TRIAL_MODERATOR_ROLES)
+
+GUILD_DATA_PROJECTION = {
+    "ticket_channel_id": 1,
+    "nsfw_ticket_channel_id": 1,
+    "ticket_new_channel_id": 1,
+    "ticket_open_channel_id": 1,
+    "ticket_closed_channel_id": 1,
+    "ticket_status_category_id": 1,
+}
+
+
+def is_trial_moderator(member):
+    return not TRIAL_MODERATOR_ROLE_IDS.isdisjoint(x.id for x in member.roles)
+
 
 @dataclass
 class Ticket(abc.ABC):
@@ -36,6 +53,8 @@ class Ticket(abc.ABC):
     status_channel_id: Optional[int] = None
     status_message_id: Optional[int] = None
 
+    _status_view: Optional[StatusView] = field(default=None, init=False, repr=False, compare=False)
+
     @property
     def guild(self):
         return self.bot.get_guild(self.guild_id)
@@ -50,15 +69,27 @@ class Ticket(abc.ABC):
             return None
         return self.guild.get_channel(self.status_channel_id)
 
+    @property
+    def status_view(self):
+        # The buttons only change once the ticket is closed, so reuse the view across edits until then
+        closed = self.closed_at is not None
+        if self._status_view is None or self._status_view.closed != closed:
+            self._status_view = StatusView(self)
+        return self._status_view
+
     @classmethod
     def build_from_mongo(cls, bot, x):
+        category = ALL_CATEGORIES.get(x["category"])
+        if category is None:
+            return None
+
         guild = bot.get_guild(x["guild_id"])
         user = guild.get_member(x["user_id"]) or FakeUser(x["user_id"])
         kwargs = {
             "bot": bot,
             "_id": x["_id"],
             "user": user,
-            "category": ALL_CATEGORIES[x["category"]],
+            "category": category,
             "guild_id": x["guild_id"],
             "channel_id": x["channel_id"],
             "thread_id": x["thread_id"],
@@ -168,8 +199,9 @@ class Ticket(abc.ABC):
         ticket_channel_id: Optional[int] = None,
         status_channel_id: Optional[int] = None,
     ):
-        _id = await category.reserve_id()
-        guild_data = await bot.mongo.db.guild.find_one({"_id": guild.id})
+        _id, guild_data = await asyncio.gather(
+            category.reserve_id(), bot.get_cog("HelpDesk").fetch_guild_data(guild.id)
+        )
 
         if ticket_channel_id is None:
             ticket_channel_id = guild_data["ticket_channel_id"]
@@ -201,8 +233,11 @@ class Ticket(abc.ABC):
         )
 
         await ticket.edit(status_channel_id=status_channel_id)
-        await thread.add_user(user)
-        await thread.send(embed=ticket.to_first_embed(), view=FirstView(ticket))
+        bot.get_cog("HelpDesk").cache_ticket(ticket)
+        await asyncio.gather(
+            thread.add_user(user),
+            thread.send(embed=ticket.to_first_embed(), view=FirstView(ticket)),
+        )
         await category.on_open(ticket)
 
         return ticket
@@ -217,7 +252,8 @@ class Ticket(abc.ABC):
         if self.closed_at is not None:
             return False
 
-        status_message = await self.fetch_status_message()
+        original_channel_id = self.status_channel_id
+        original = self.closed_at, self.agent, original_channel_id, self.status_message_id
 
         if closed_at is not MISSING:
             self.closed_at = closed_at
@@ -226,36 +262,42 @@ class Ticket(abc.ABC):
         if status_channel_id is not MISSING:
             self.status_channel_id = status_channel_id
 
-        await self.update_status_message(status_message)
-        await self.bot.mongo.db.ticket.update_one({"_id": self._id}, {"$set": self.to_dict()}, upsert=True)
+        try:
+            await self.update_status_message(original_channel_id)
+            await self.bot.mongo.db.ticket.update_one({"_id": self._id}, {"$set": self.to_dict()}, upsert=True)
+        except Exception:
+            # Tickets are shared through the cache, so roll back to what's stored rather than leave it half edited
+            self.closed_at, self.agent, self.status_channel_id, self.status_message_id = original
+            raise
 
         return True
 
-    async def fetch_status_message(self):
-        if self.status_channel is None or self.status_message_id is None:
-            return None
-        try:
-            return await self.status_channel.fetch_message(self.status_message_id)
-        except discord.NotFound:
-            return None
+    async def update_status_message(self, original_channel_id=None):
+        # Work on partial messages so we don't have to fetch the status message before editing or deleting it
+        if self.status_message_id is not None and original_channel_id != self.status_channel_id:
+            if original_channel := self.guild.get_channel(original_channel_id):
+                with contextlib.suppress(discord.NotFound):
+                    await original_channel.get_partial_message(self.status_message_id).delete()
+            self.status_message_id = None
 
-    async def update_status_message(self, original=None):
-        if original is not None and original.channel.id != self.status_channel_id:
-            await original.delete()
-            original = None
+        if self.status_channel is None:
+            return
 
-        if self.status_channel is not None:
-            if original is None:
-                status_message = await self.status_channel.send(embed=self.to_status_embed(), view=StatusView(self))
-                self.status_message_id = status_message.id
-            else:
-                await original.edit(embed=self.to_status_embed(), view=StatusView(self))
+        if self.status_message_id is not None:
+            try:
+                partial = self.status_channel.get_partial_message(self.status_message_id)
+                return await partial.edit(embed=self.to_status_embed(), view=self.status_view)
+            except discord.NotFound:
+                pass
+
+        status_message = await self.status_channel.send(embed=self.to_status_embed(), view=self.status_view)
+        self.status_message_id = status_message.id
 
     async def close(self, user: discord.Member):
         if self.closed_at is not None:
             return False
 
-        guild_data = await self.bot.mongo.db.guild.find_one({"_id": self.guild_id})
+        guild_data = await self.bot.get_cog("HelpDesk").fetch_guild_data(self.guild_id)
 
         await self.edit(closed_at=datetime.now(timezone.utc), status_channel_id=guild_data["ticket_closed_channel_id"])
         with contextlib.suppress(discord.HTTPException):
@@ -268,7 +310,7 @@ class Ticket(abc.ABC):
         if self.closed_at is not None:
             return False
 
-        guild_data = await self.bot.mongo.db.guild.find_one({"_id": self.guild_id})
+        guild_data = await self.bot.get_cog("HelpDesk").fetch_guild_data(self.guild_id)
 
         if self.status_channel_id == guild_data["ticket_new_channel_id"]:
             await self.edit(agent=user, status_channel_id=guild_data["ticket_open_channel_id"])
@@ -296,7 +338,7 @@ class ClaimTicketButton(discord.ui.Button):
         self.ticket = ticket
 
     async def callback(self, interaction: discord.Interaction):
-        if any(x.id in constants.TRIAL_MODERATOR_ROLES for x in interaction.user.roles):
+        if is_trial_moderator(interaction.user):
             await self.ticket.claim(interaction.user)
             await interaction.response.defer()
         else:
@@ -315,13 +357,36 @@ class CloseTicketButton(discord.ui.Button):
         self.ticket = ticket
 
     async def callback(self, interaction: discord.Interaction):
-        if interaction.user == self.ticket.user or any(
-            x.id in constants.TRIAL_MODERATOR_ROLES for x in interaction.user.roles
-        ):
+        if interaction.user == self.ticket.user or is_trial_moderator(interaction.user):
             await self.ticket.close(interaction.user)
             await interaction.response.defer()
 
 
+class PersistentTicketButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"persistent:ticket:(?P<action>close|claim):(?P<ticket_id>.+)",
+):
+    """Routes presses on the buttons of any ticket's status or first message to that ticket."""
+
+    buttons = {"close": CloseTicketButton, "claim": ClaimTicketButton}
+
+    def __init__(self, action: str, ticket_id: str):
+        super().__init__(discord.ui.Button(custom_id=f"persistent:ticket:{action}:{ticket_id}"))
+        self.action = action
+        self.ticket_id = ticket_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["ticket_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        ticket = await interaction.client.get_cog("HelpDesk").fetch_ticket_by_id(self.ticket_id)
+        if ticket is not None:
+            await self.buttons[self.action](ticket).callback(interaction)
+        else:
+            await interaction.response.send_message("Could not find that ticket!")
+
+
 class JumpToTicketButton(discord.ui.Button):
     def __init__(self, ticket: Ticket):
         super().__init__(
@@ -386,7 +451,7 @@ class OpenReportModal(OpenTicketModal):
 
 class OpenNSFWReportModal(OpenReportModal):
     async def on_submit(self, interaction: discord.Interaction, **ticket_kwargs):
-        guild_data = await self.bot.mongo.db.guild.find_one({"_id": interaction.guild.id})
+        guild_data = await self.bot.get_cog("HelpDesk").fetch_guild_data(interaction.guild.id)
         ticket_kwargs = {
             "subject": f"[NSFW] Report for {self.subject.value}",
             "ticket_channel_id": guild_data["nsfw_ticket_channel_id"],
@@ -406,6 +471,7 @@ class StatusView(discord.ui.View):
     def __init__(self, ticket: Ticket):
         super().__init__()
         self.stop()
+        self.closed = ticket.closed_at is not None
         self.add_item(ClaimTicketButton(ticket, style=discord.ButtonStyle.primary))
         self.add_item(CloseTicketButton(ticket, style=discord.ButtonStyle.danger))
         self.add_item(JumpToTicketButton(ticket))
@@ -731,7 +797,7 @@ class HelpDeskView(discord.ui.View):
         self.select = HelpDeskSelect(bot)
         self.add_item(self.select)
 
-    @property
+    @cached_property
     def text(self):
         return "\n\n".join(
             [
@@ -773,26 +839,73 @@ class ReportView(discord.ui.View):
 class HelpDesk(commands.Cog):
     """For the help desk on the support server."""
 
+    guild_data_ttl = 300  # seconds
+    ticket_cache_size = 512
+
     def __init__(self, bot):
         self.bot = bot
+        self._guild_data = {}
+        self._tickets = OrderedDict()
+        self._ticket_ids_by_thread = {}
         self.bot.loop.create_task(self.setup_view())
 
+    async def cog_load(self):
+        await self.bot.mongo.db.ticket.create_index([("thread_id", 1)])
+
     async def setup_view(self):
         await self.bot.wait_until_ready()
         self.view = HelpDeskView(self.bot)
         self.report_view = ReportView(self.bot)
         self.bot.add_view(self.view)
         self.bot.add_view(self.report_view)
+        self.bot.add_dynamic_items(PersistentTicketButton)
+
+    async def fetch_guild_data(self, guild_id):
+        """Returns the ticket channel settings for a guild, cached for a few minutes."""
+
+        expires_at, guild_data = self._guild_data.get(guild_id, (0, None))
+        if expires_at < self.bot.loop.time():
+            guild_data = await self.bot.mongo.db.guild.find_one({"_id": guild_id}, GUILD_DATA_PROJECTION)
+            self._guild_data[guild_id] = (self.bot.loop.time() + self.guild_data_ttl, guild_data)
+        return guild_data
+
+    def cache_ticket(self, ticket):
+        """Keeps a ticket in memory so that later interactions with it don't have to go through Mongo."""
+
+        if ticket is None:
+            return None
+
+        self._tickets[ticket._id] = ticket
+        self._tickets.move_to_end(ticket._id)
+        self._ticket_ids_by_thread[ticket.thread_id] = ticket._id
+
+        if len(self._tickets) > self.ticket_cache_size:
+            _, evicted = self._tickets.popitem(last=False)
+            self._ticket_ids_by_thread.pop(evicted.thread_id, None)
+
+        return ticket
+
+    def get_cached_ticket(self, _id):
+        ticket = self._tickets.get(_id)
+        if ticket is not None:
+            self._tickets.move_to_end(_id)
+        return ticket
 
     async def fetch_ticket_by_id(self, _id):
+        if ticket := self.get_cached_ticket(_id):
+            return ticket
+
         ticket = await self.bot.mongo.db.ticket.find_one({"_id": _id})
         if ticket is not None:
-            return Ticket.build_from_mongo(self.bot, ticket)
+            return self.cache_ticket(Ticket.build_from_mongo(self.bot, ticket))
 
     async def fetch_ticket_by_thread(self, thread_id):
+        if ticket := self.get_cached_ticket(self._ticket_ids_by_thread.get(thread_id)):
+            return ticket
+
         ticket = await self.bot.mongo.db.ticket.find_one({"thread_id": thread_id})
         if ticket is not None:
-            return Ticket.build_from_mongo(self.bot, ticket)
+            return self.cache_ticket(Ticket.build_from_mongo(self.bot, ticket))
 
     @commands.Cog.listener()
     async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
@@ -813,27 +926,6 @@ class HelpDesk(commands.Cog):
     async def makereportdesk(self, ctx):
         await ctx.send(self.report_view.text, view=self.report_view)
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
-        if interaction.type != discord.InteractionType.component:
-            return
-
-        custom_id = interaction.data["custom_id"]
-        if custom_id.startswith("persistent:ticket:close"):
-            button_cls = CloseTicketButton
-            ticket_id = custom_id.removeprefix("persistent:ticket:close:")
-        elif custom_id.startswith("persistent:ticket:claim"):
-            button_cls = ClaimTicketButton
-            ticket_id = custom_id.removeprefix("persistent:ticket:claim:")
-        else:
-            return
-
-        ticket = await self.fetch_ticket_by_id(ticket_id)
-        if ticket is not None:
-            await button_cls(ticket).callback(interaction)
-        else:
-            await interaction.response.send_message("Could not find that ticket!")
-
     @commands.hybrid_command()
     async def close(self, ctx, *, ticket_thread: discord.Thread = None):
         """Marks a ticket as closed.
@@ -845,7 +937,7 @@ class HelpDesk(commands.Cog):
         if ticket is None:
             return await ctx.send("Could not find ticket!", ephemeral=True)
 
-        if ctx.author == ticket.user or any(x.id in constants.TRIAL_MODERATOR_ROLES for x in ctx.author.roles):
+        if ctx.author == ticket.user or is_trial_moderator(ctx.author):
             result = await ticket.close(ctx.author)
             if ctx.channel != ticket_thread:
                 if result:
@@ -887,7 +979,7 @@ class HelpDesk(commands.Cog):
         if ticket is None:
             return await ctx.send("Could not find ticket!", ephemeral=True)
 
-        guild_data = await self.bot.mongo.db.guild.find_one({"_id": ticket.guild_id})
+        guild_data = await self.fetch_guild_data(ticket.guild_id)
 
         if status_channel.category_id != guild_data["ticket_status_category_id"] or status_channel.id in (
             guild_data["ticket_new_channel_id"],
@@ -921,7 +1013,7 @@ class HelpDesk(commands.Cog):
     async def report(self, ctx, user: discord.Member, nsfw: Optional[bool] = False, *, reason):
         """Reports a user to server moderators."""
 
-        guild_data = await self.bot.mongo.db.guild.find_one({"_id": ctx.guild.id})
+        guild_data = await self.fetch_guild_data(ctx.guild.id)
 
         if nsfw:
             ticket_channel_id = guild_data["nsfw_ticket_channel_id"]
@@ -947,6 +1039,7 @@ class HelpDesk(commands.Cog):
     async def cog_unload(self):
         self.view.stop()
         self.report_view.stop()
+        self.bot.remove_dynamic_items(PersistentTicketButton)
 
 
 async def setup(bot):
@@ -13,7 +13,7 @@ from discord.ui import button
 
 from helpers import checks, constants, time
 from helpers.pagination import AsyncEmbedFieldsPageSource
-from helpers.utils import FakeUser, FetchUserConverter, with_attachment_urls
+from helpers.utils import FakeContext, FakeUser, FetchUserConverter, with_attachment_urls
 
 
 class ModerationUserFriendlyTime(time.UserFriendlyTime):
@@ -327,12 +327,6 @@ class TradingUnmute(Action):
         await super().execute(ctx)
 
 
-@dataclass
-class FakeContext:
-    bot: commands.Bot
-    guild: discord.Guild
-
-
 cls_dict = {
     x.type: x for x in (Kick, Ban, Unban, Warn, Note, Timeout, Untimeout, Mute, Unmute, TradingMute, TradingUnmute)
 }
@@ -10,12 +10,9 @@ from helpers.context import GuiduckContext
 
 class SpeciesConverter(commands.Converter):
     async def convert(self, ctx, arg):
-        if arg.startswith("#") and arg[1:].isdigit():
-            arg = arg[1:]
-
-        if arg.isdigit():
-            species = ctx.bot.data.species_by_number(int(arg))
-        else:
+        try:
+            species = ctx.bot.data.species_by_number(int(arg.removeprefix("#")))
+        except ValueError:
             species = ctx.bot.data.species_by_name(arg)
 
         if species is None:
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 from textwrap import shorten
 from typing import Iterable, List, NamedTuple, Optional
@@ -12,6 +13,9 @@ class FakeAvatar(NamedTuple):
     url: str
 
 
+DEFAULT_AVATAR = FakeAvatar("https://cdn.discordapp.com/embed/avatars/0.png")
+
+
 class FakeUser(discord.Object):
     @property
     def avatar(self):
@@ -19,7 +23,7 @@ class FakeUser(discord.Object):
 
     @property
     def default_avatar(self):
-        return FakeAvatar("https://cdn.discordapp.com/embed/avatars/0.png")
+        return DEFAULT_AVATAR
 
     @property
     def display_avatar(self):
@@ -46,6 +50,20 @@ class FakeUser(discord.Object):
         pass
 
 
+@dataclass
+class FakeContext:
+    bot: commands.Bot
+    guild: discord.Guild
+    message: Optional[discord.Message] = None
+    channel: Optional[discord.abc.Messageable] = None
+    author: Optional[discord.Member] = None
+
+    @classmethod
+    def from_message(cls, bot, message):
+        """Builds a context for a message without going through prefix or command parsing."""
+        return cls(bot, message.guild, message, message.channel, message.author)
+
+
 class FetchUserConverter(commands.Converter):
     async def convert(self, ctx, arg):
         try: